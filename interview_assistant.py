@@ -1,10 +1,33 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
-import speech_recognition as sr
-import pyaudio # Though not directly used if sr handles mic, good to have for potential direct use
-import google.generativeai as genai
 import threading
+import asyncio
+import logging
+import logging.handlers
+import queue
+import mmap
+import re
+import hashlib
+import random
+import math
 import os
+from collections import OrderedDict, deque
+
+# --- Logging ---
+# Per-utterance and per-response chatter is logged at DEBUG, and only when
+# INTERVIEW_ASSISTANT_VERBOSE=1. Those calls sit behind `if __debug__ and VERBOSE:`,
+# so by default (and entirely under `python -O`) the audio and streaming paths
+# skip even the logging call
+VERBOSE = os.getenv("INTERVIEW_ASSISTANT_VERBOSE", "0") not in ("", "0")
+# Records are handed to a queue and written to the console by a listener thread, so
+# the audio, streaming and Tk threads never block on console I/O
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s",
+                    handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener.start()
+logger = logging.getLogger("interview_assistant")
+logger.setLevel(logging.DEBUG if VERBOSE else logging.INFO) # Third-party loggers stay at INFO
 
 # --- Configuration ---
 # IMPORTANT: User needs to configure their Gemini API Key
@@ -12,156 +35,591 @@ import os
 # Option 2: Directly paste the key here (less secure)
 # GEMINI_API_KEY = "YOUR_GEMINI_API_KEY"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Streaming speech recognition runs on Google Cloud Speech-to-Text V2, which needs
+# a project ID (and Application Default Credentials, e.g. `gcloud auth application-default login`)
+GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 
-if not GEMINI_API_KEY:
-    # Attempt to read from a .env file if it exists, for convenience
+ENV_FILE_PATTERN = re.compile(rb"^[ \t]*(GEMINI_API_KEY|GOOGLE_CLOUD_PROJECT)=(.*?)[ \t\r]*$", re.MULTILINE)
+
+if not GEMINI_API_KEY or not GOOGLE_CLOUD_PROJECT:
+    # Attempt to read from a .env file if it exists, for convenience.
+    # One regex pass over the mapped file instead of splitting it line by line.
     try:
-        with open(".env", "r") as f:
-            for line in f:
-                if line.strip().startswith("GEMINI_API_KEY="):
-                    GEMINI_API_KEY = line.strip().split("=")[1]
-                    break
+        with open(".env", "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as env_file:
+            # reversed() so the first assignment of a name wins, as with a top-down scan
+            env_values = {name.decode(): value.decode() for name, value in reversed(ENV_FILE_PATTERN.findall(env_file))}
+        GEMINI_API_KEY = GEMINI_API_KEY or env_values.get("GEMINI_API_KEY")
+        GOOGLE_CLOUD_PROJECT = GOOGLE_CLOUD_PROJECT or env_values.get("GOOGLE_CLOUD_PROJECT")
     except FileNotFoundError:
         pass # .env file not found, that's fine
+    except ValueError:
+        pass # .env file is empty (an empty file cannot be mapped)
+
+# system_instruction needs a 1.5+ model; the original 'gemini-pro' rejects it
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+GEMINI_SYSTEM_INSTRUCTION = ("You are an interview coach. The user is in a live interview and will send you "
+                             "the recent conversation or question directed at them. Reply with concise "
+                             "talking points or a suggested response.")
+GEMINI_SUMMARY_INSTRUCTION = ("Summarize the interview conversation you are given in at most 500 characters, "
+                              "keeping the questions asked and the key points of the answers.")
+CONVERSATION_SUMMARY_CHARS = 500
+gemini_model = None
+gemini_summary_model = None
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
-    print("GEMINI_API_KEY not found in environment variables or .env file.")
+if not GEMINI_API_KEY:
+    logger.warning("GEMINI_API_KEY not found in environment variables or .env file.")
     # Optionally, show a GUI error here or exit, as Gemini functionality will fail.
     # For now, we'll let it proceed and fail when Gemini is called.
 
-# Global variable to hold the recognizer and microphone instance
-r = sr.Recognizer()
-mic = sr.Microphone()
-is_listening = False
-listening_thread = None
+if not GOOGLE_CLOUD_PROJECT:
+    logger.warning("GOOGLE_CLOUD_PROJECT not found in environment variables or .env file.")
+    # Listening will refuse to start until a project is configured.
+
+# --- Lazy Imports ---
+# sounddevice, the Speech-to-Text client and google.generativeai pull in PortAudio, grpc and
+# protobuf, which would delay the first paint of the window by seconds. They are bound
+# to these module globals on first use, or earlier by prewarm_imports() once the UI is up.
+sd = None
+np = None
+resample_poly = None # Optional (scipy); audioop.ratecv is the fallback resampler
+audioop = None
+ClientOptions = None
+speech_v2 = None
+cloud_speech = None
+duration_pb2 = None
+genai = None
+lazy_import_lock = threading.Lock()
+
+def load_stt_modules():
+    global sd, np, resample_poly, audioop, ClientOptions, speech_v2, cloud_speech, duration_pb2
+    with lazy_import_lock:
+        if duration_pb2 is None: # Bound last, so a partial failure is retried
+            import sounddevice as sd
+            import numpy as np
+            try:
+                from scipy.signal import resample_poly
+            except ImportError:
+                try:
+                    import audioop # Deprecated, and removed in Python 3.13
+                except ImportError:
+                    pass
+            from google.api_core.client_options import ClientOptions
+            from google.cloud import speech_v2
+            from google.cloud.speech_v2.types import cloud_speech
+            from google.protobuf import duration_pb2
+
+def load_gemini():
+    global genai, gemini_model, gemini_summary_model
+    with lazy_import_lock:
+        if gemini_model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            # One model for the whole session, so every suggestion reuses the same client channel
+            gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME, system_instruction=GEMINI_SYSTEM_INSTRUCTION)
+            gemini_summary_model = genai.GenerativeModel(GEMINI_MODEL_NAME, system_instruction=GEMINI_SUMMARY_INSTRUCTION)
+
+def prewarm_imports():
+    # Runs in a background thread so the imports overlap with the user reading the window
+    try:
+        load_stt_modules()
+        if GEMINI_API_KEY:
+            load_gemini()
+    except Exception as e:
+        logger.warning("Could not preload speech/Gemini modules: %s", e)
+
+# --- Audio / STT Configuration ---
+SAMPLE_RATE = 16000 # Speech-to-Text models are trained on 16 kHz mono audio
+CHUNKS_PER_SECOND = 10 # 100 ms of audio per mic read and per streaming request
+AUDIO_QUEUE_SIZE = 50 # Chunks buffered while a streaming session reconnects (5 s)
+RETRY_BACKOFF_MIN_S = 0.1 # First retry after a mic/STT error, doubled per consecutive failure
+RETRY_BACKOFF_MAX_S = 8.0
+STT_LANGUAGE = "en-US"
+STT_MODEL = "chirp_3"
+STT_LOCATION = "us" # Chirp 3 is served from regional endpoints, not "global"
+
+# Endpointing: how quickly a pause ends an utterance. Google's defaults wait ~2.4 s
+# after short phrases; these can be retuned from the UI while listening.
+SPEECH_END_TIMEOUT_MS = 500    # Trailing silence that finalizes an utterance
+SPEECH_START_TIMEOUT_S = 10    # Silence allowed before any speech starts
+ENDPOINTING_SENSITIVITY = "SHORT"
+ENDPOINTING_SENSITIVITIES = ("STANDARD", "SHORT", "SUPERSHORT")
+
+# Global state for the Speech-to-Text client and the listening loop
+speech_client = None # Created on first use so a missing credential doesn't break startup
+is_listening = False # UI state, only touched on the Tk thread
+listening_future = None
+# Signals for the listening coroutine. They are asyncio events so the loop wakes as
+# soon as they are set; the Tk thread sets them through signal_async().
+stop_listening = None # A fresh asyncio.Event per listening period
+stt_settings_changed = asyncio.Event() # Set to restart the stream with new endpointing settings
+ui_queue = queue.Queue() # UI updates posted by the async loop, run on the Tk thread
+pending_transcripts = deque() # (stop_event, text, is_final) from the STT loop, applied in one batch per UI tick
+
+# Speech and Gemini I/O run as coroutines on one asyncio loop in a background thread,
+# using the grpc.aio clients, so neither blocks the other or the Tk thread
+async_loop = None
+background_tasks = set() # The loop only keeps weak references to tasks
+
+# The transcript widget only shows the most recent lines; Text re-indexes its whole
+# buffer on insert, so an unbounded widget gets slower over a long interview.
+TRANSCRIPT_MAX_LINES = 500
+TRANSCRIPT_TRIM_LINES = 100 # Oldest lines dropped at once when the widget is over the limit
+
+# Gemini responses keyed by prompt digest, least recently used first
+GEMINI_CACHE_SIZE = 64
+gemini_cache = OrderedDict()
+# Each suggestion only sends the final utterances not yet sent to Gemini (kept here,
+# independent of the trimmed widget) plus the current interim hypothesis; everything
+# sent earlier is carried forward as the rolling summary
+unsent_transcript = deque(maxlen=10000)
+current_interim = ""
+conversation_summary = ""
+last_gemini_prompt = None
+# Refreshes run one at a time, so each starts from the summary the previous one wrote
+summary_lock = asyncio.Lock()
+
+# --- Async Worker Loop ---
+def run_async(coro):
+    """Schedule coro on the background asyncio loop, starting the loop on first use."""
+    global async_loop
+    if async_loop is None:
+        async_loop = asyncio.new_event_loop()
+        threading.Thread(target=async_loop.run_forever, daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, async_loop)
+
+def signal_async(event):
+    """Set an asyncio.Event owned by the background loop from the Tk thread."""
+    async_loop.call_soon_threadsafe(event.set)
+
+# --- UI Thread Helpers ---
+def post_ui(func, *args, **kwargs):
+    """Run func on the Tk main thread; Tk widgets must not be touched from other threads."""
+    ui_queue.put((func, args, kwargs))
+
+def drain_ui_queue():
+    # One failing update (e.g. a TclError) must not stop the updates after it,
+    # or keep the next tick from being scheduled
+    try:
+        while True:
+            try:
+                func, args, kwargs = ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception("UI update %s failed", getattr(func, "__name__", func))
+        flush_transcripts()
+    finally:
+        app.after(50, drain_ui_queue)
+
+def set_status(text):
+    status_label.config(text=text)
 
 # --- STT Functionality ---
 def toggle_listening():
-    global is_listening, listening_thread
+    global is_listening, listening_future, stop_listening, current_interim, conversation_summary, last_gemini_prompt
     if not GEMINI_API_KEY:
         messagebox.showerror("API Key Error", "Gemini API Key not configured. Please set the GEMINI_API_KEY environment variable.")
         return
+    if not GOOGLE_CLOUD_PROJECT:
+        messagebox.showerror("Project Error", "Google Cloud project not configured. Please set the GOOGLE_CLOUD_PROJECT environment variable.")
+        return
 
     if is_listening:
         is_listening = False
-        if listening_thread:
-            # We can't forcefully stop a thread easily,
-            # but STT library might offer a way or it will stop on next audio chunk processing.
-            # For speech_recognition, stopping is managed by its internal listening loop ending.
+        if listening_future:
+            # Wakes the request generator at once, which ends the streaming request to
+            # Google; listen_for_audio then closes the microphone.
+            signal_async(stop_listening)
             listen_button.config(text="Start Listening")
             status_label.config(text="Status: Not Listening")
-        print("Stopped listening.")
+        logger.info("Stopped listening.")
     else:
         is_listening = True
         listen_button.config(text="Stop Listening")
         status_label.config(text="Status: Listening...")
+        pending_transcripts.clear() # Drop anything left over from the previous session
         transcribed_text_area.delete(1.0, tk.END) # Clear previous transcription
+        transcribed_text_area.mark_set("interim", "end-1c") # Interim hypotheses are shown after this mark
         gemini_suggestions_area.delete(1.0, tk.END) # Clear previous suggestions
-        # Start listening in a new thread to avoid freezing the GUI
-        listening_thread = threading.Thread(target=listen_for_audio, daemon=True)
-        listening_thread.start()
-        print("Started listening.")
+        unsent_transcript.clear() # New conversation, nothing has been sent yet
+        current_interim = ""
+        conversation_summary = ""
+        last_gemini_prompt = None
+        # Listen on the async loop to avoid freezing the GUI
+        stop_listening = asyncio.Event()
+        listening_future = run_async(listen_for_audio(stop_listening))
+        logger.info("Started listening.")
+
+def put_dropping_oldest(audio_queue, item):
+    # Never hold up the microphone: if recognition has fallen a full queue behind,
+    # discard the oldest chunk instead.
+    try:
+        audio_queue.put_nowait(item)
+    except asyncio.QueueFull:
+        try:
+            audio_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        audio_queue.put_nowait(item)
+
+def make_pcm_converter(channels, rate):
+    """Return a function turning device Int16 PCM chunks into 16 kHz mono LINEAR16 bytes."""
+    if channels == 1 and rate == SAMPLE_RATE:
+        return lambda chunk: chunk
+    ratecv_state = None
+    # resample_poly zero-pads each call at both ends, so it is run over a sliding window
+    # instead of chunk by chunk: every output sample is only emitted once the window holds
+    # all the input its filter reaches (half of 10 * max(up, down) upsampled taps), and
+    # the window slides in steps of `down` so its outputs line up with the whole signal's
+    up, down = SAMPLE_RATE // math.gcd(SAMPLE_RATE, rate), rate // math.gcd(SAMPLE_RATE, rate)
+    reach = -(-10 * max(up, down) // up) + 1 # Input samples the filter reaches on each side
+    window = np.zeros(0)
+    window_start = 0 # Input index of window[0], a multiple of down
+    next_out = 0 # Output index of the next sample to emit
+
+    def convert(chunk):
+        nonlocal ratecv_state, window, window_start, next_out
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1) # Mono mix (float, no int16 overflow)
+        if rate != SAMPLE_RATE:
+            if resample_poly is None:
+                # audioop keeps filter state between calls, so chunk boundaries stay seamless
+                pcm, ratecv_state = audioop.ratecv(samples.astype(np.int16).tobytes(), 2, 1,
+                                                   rate, SAMPLE_RATE, ratecv_state)
+                return pcm
+            window = np.concatenate((window, samples))
+            first_out = window_start * up // down
+            end_out = (window_start + len(window) - reach) * up // down + 1
+            samples = resample_poly(window, up, down)[next_out - first_out:end_out - first_out]
+            next_out = max(next_out, end_out)
+            keep_from = max(window_start, (next_out * down // up - reach) // down * down)
+            window = window[keep_from - window_start:]
+            window_start = keep_from
+        return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+    return convert
+
+def open_input_stream(audio_queue, loop):
+    """Open and start the default microphone, queueing 16 kHz mono chunks on audio_queue.
+
+    16 kHz mono is used when the device supports it. Otherwise the device's native
+    rate (often 44.1/48 kHz, possibly stereo) is captured and converted by
+    make_pcm_converter, which keeps a third of the bytes off the wire. The stream
+    stays open for the whole listening period, across streaming sessions.
+    """
+    channels, rate = 1, SAMPLE_RATE
+    try:
+        sd.check_input_settings(channels=1, dtype="int16", samplerate=SAMPLE_RATE)
+    except (sd.PortAudioError, ValueError):
+        if resample_poly is not None or audioop is not None:
+            device = sd.query_devices(kind="input")
+            channels, rate = min(2, device["max_input_channels"]), int(device["default_samplerate"])
+        else:
+            logger.warning("Neither scipy nor audioop is available to resample; trying the microphone at 16 kHz anyway.")
+    convert = make_pcm_converter(channels, rate)
+
+    def on_audio(indata, frames, time_info, status):
+        # Runs on PortAudio's callback thread: convert, then hand off to the asyncio loop
+        # that owns audio_queue (asyncio queues are not thread-safe)
+        if status:
+            logger.warning("Audio input status: %s", status)
+        loop.call_soon_threadsafe(put_dropping_oldest, audio_queue, convert(bytes(indata)))
+
+    stream = sd.RawInputStream(samplerate=rate, channels=channels, dtype="int16",
+                               blocksize=rate // CHUNKS_PER_SECOND, callback=on_audio)
+    stream.start()
+    return stream
+
+async def streaming_requests(audio_queue, stop_event):
+    """Yield the streaming config followed by one request per queued audio chunk."""
+    recognition_config = cloud_speech.RecognitionConfig(
+        explicit_decoding_config=cloud_speech.ExplicitDecodingConfig(
+            encoding=cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+            audio_channel_count=1,
+        ),
+        language_codes=[STT_LANGUAGE],
+        model=STT_MODEL,
+    )
+    streaming_features = cloud_speech.StreamingRecognitionFeatures(
+        interim_results=True,
+        enable_voice_activity_events=True, # Required for voice_activity_timeout to apply
+        voice_activity_timeout=cloud_speech.StreamingRecognitionFeatures.VoiceActivityTimeout(
+            speech_start_timeout=duration_pb2.Duration(seconds=SPEECH_START_TIMEOUT_S),
+            speech_end_timeout=duration_pb2.Duration(seconds=SPEECH_END_TIMEOUT_MS // 1000,
+                                                     nanos=(SPEECH_END_TIMEOUT_MS % 1000) * 1_000_000),
+        ),
+        endpointing_sensitivity=getattr(cloud_speech.StreamingRecognitionFeatures.EndpointingSensitivity,
+                                        f"ENDPOINTING_SENSITIVITY_{ENDPOINTING_SENSITIVITY}"),
+    )
+    streaming_config = cloud_speech.StreamingRecognitionConfig(
+        config=recognition_config,
+        streaming_features=streaming_features,
+    )
+    yield cloud_speech.StreamingRecognizeRequest(
+        recognizer=f"projects/{GOOGLE_CLOUD_PROJECT}/locations/{STT_LOCATION}/recognizers/_",
+        streaming_config=streaming_config,
+    )
+
+    # Ending the request stream early makes Google flush pending results and close the
+    # session; listen_for_audio then stops, or reopens it with the updated settings.
+    # When a session fails, grpc.aio cancels this generator along with the call.
+    stop_waits = [asyncio.ensure_future(stop_event.wait()), asyncio.ensure_future(stt_settings_changed.wait())]
+    next_chunk = None
+    try:
+        while True:
+            next_chunk = asyncio.ensure_future(audio_queue.get())
+            done, _ = await asyncio.wait([next_chunk, *stop_waits], return_when=asyncio.FIRST_COMPLETED)
+            if next_chunk not in done:
+                next_chunk.cancel() # A cancelled get() leaves the queued audio in place
+                return
+            yield cloud_speech.StreamingRecognizeRequest(audio=next_chunk.result())
+    finally:
+        # Also when cancelled mid-wait: a get() left running would swallow the next chunk
+        if next_chunk is not None and not next_chunk.done():
+            next_chunk.cancel()
+        for wait in stop_waits:
+            wait.cancel()
+
+def apply_stt_settings(*_):
+    global SPEECH_END_TIMEOUT_MS, ENDPOINTING_SENSITIVITY
+    try:
+        speech_end_timeout_ms = int(speech_end_entry.get())
+        if speech_end_timeout_ms <= 0:
+            raise ValueError
+    except ValueError:
+        # Restore the last valid value
+        speech_end_entry.delete(0, tk.END)
+        speech_end_entry.insert(0, str(SPEECH_END_TIMEOUT_MS))
+        return
 
-def listen_for_audio():
-    global is_listening
-    # Adjust recognizer settings if needed
-    r.pause_threshold = 0.8  # seconds of non-speaking audio before a phrase is considered complete
-    r.energy_threshold = 300 # minimum audio energy to consider for recording
+    if (speech_end_timeout_ms, sensitivity_var.get()) == (SPEECH_END_TIMEOUT_MS, ENDPOINTING_SENSITIVITY):
+        return
+    SPEECH_END_TIMEOUT_MS = speech_end_timeout_ms
+    ENDPOINTING_SENSITIVITY = sensitivity_var.get()
+    logger.info("Endpointing updated: speech_end_timeout=%d ms, sensitivity=%s", SPEECH_END_TIMEOUT_MS, ENDPOINTING_SENSITIVITY)
+    if is_listening:
+        signal_async(stt_settings_changed)
 
-    while is_listening:
-        print("Microphone check: Attempting to listen...")
-        try:
-            with mic as source:
-                # r.adjust_for_ambient_noise(source, duration=0.5) # Adjust for noise (optional, can add latency)
-                status_label.config(text="Status: Listening...")
-                app.update_idletasks() # Update UI
-                try:
-                    audio = r.listen(source, timeout=5, phrase_time_limit=10) # Listen for up to 5s, phrase up to 10s
-                except sr.WaitTimeoutError:
-                    print("No speech detected in the last 5 seconds.")
-                    if not is_listening: # Check if stopped while waiting
-                        break
-                    continue # Continue listening
-
-            if not is_listening: # Check if stopped while processing
-                break
+def flush_transcripts():
+    """Apply every pending transcript update with one delete, one insert and one scroll."""
+    global current_interim
+    if not pending_transcripts:
+        return
+    finals = []
+    interim = None
+    while pending_transcripts:
+        session, text, is_final = pending_transcripts.popleft()
+        if session is not stop_listening:
+            continue # Late results from an earlier listening period
+        if is_final:
+            finals.append(text)
+            interim = "" # Superseded by the final result
+        else:
+            interim = text # Only the newest hypothesis is worth drawing
+    if interim is None:
+        return # Nothing from the current listening period
+
+    # Replace the previous interim hypothesis (everything after the "interim" mark)
+    transcribed_text_area.delete("interim", tk.END)
+    if finals:
+        transcribed_text_area.insert(tk.END, "\n".join(finals) + "\n")
+        transcribed_text_area.mark_set("interim", "end-1c")
+        unsent_transcript.extend(finals)
+    if interim:
+        transcribed_text_area.insert(tk.END, interim)
+    current_interim = interim
+
+    line_count = int(transcribed_text_area.index("end-1c").split(".")[0])
+    if line_count > TRANSCRIPT_MAX_LINES:
+        transcribed_text_area.delete("1.0", f"{TRANSCRIPT_TRIM_LINES + 1}.0")
+    transcribed_text_area.see(tk.END) # Scroll to the end
+
+async def listen_for_audio(stop_event):
+    """Feed microphone audio into streaming sessions and post transcripts to the UI."""
+    global speech_client
+    loop = asyncio.get_running_loop()
+    audio_queue = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+    stream = None
+    backoff = RETRY_BACKOFF_MIN_S
 
-            status_label.config(text="Status: Recognizing...")
-            app.update_idletasks()
-            try:
-                text = r.recognize_google(audio) # Using Google Web Speech API
-                print(f"Transcribed: {text}")
-                transcribed_text_area.insert(tk.END, text + "\n")
-                transcribed_text_area.see(tk.END) # Scroll to the end
-            except sr.UnknownValueError:
-                print("Google Web Speech API could not understand audio")
-                # transcribed_text_area.insert(tk.END, "[Could not understand audio]\n")
-            except sr.RequestError as e:
-                print(f"Could not request results from Google Web Speech API; {e}")
-                transcribed_text_area.insert(tk.END, f"[API Request Error: {e}]\n")
-            finally:
-                if is_listening: # If still listening, briefly show listening status
-                    status_label.config(text="Status: Listening...")
-                else:
-                    status_label.config(text="Status: Not Listening")
-                app.update_idletasks()
+    try:
+        await asyncio.to_thread(load_stt_modules) # Usually already done by prewarm_imports
+    except (ImportError, OSError) as e: # sounddevice raises OSError when PortAudio is missing
+        logger.error("Could not load speech recognition modules: %s", e)
+        post_ui(messagebox.showerror, "Speech Recognition Error", f"Could not load speech recognition modules: {e}")
+        stop_event.set()
+
+    while not stop_event.is_set():
+        # Each iteration is one streaming session; Google closes streams after ~5 minutes
+        # or on error, while the microphone stream keeps buffering audio in between.
+        try:
+            if stream is None or not stream.active: # First session, or the device failed
+                if stream is not None:
+                    stream.close()
+                stream = await asyncio.to_thread(open_input_stream, audio_queue, loop)
+            if speech_client is None:
+                # The client's grpc.aio channel belongs to this loop
+                speech_client = speech_v2.SpeechAsyncClient(
+                    client_options=ClientOptions(api_endpoint=f"{STT_LOCATION}-speech.googleapis.com"))
+            stt_settings_changed.clear()
+
+            if __debug__ and VERBOSE:
+                logger.debug("Opening streaming recognition session...")
+            post_ui(set_status, "Status: Listening...")
+            responses = await speech_client.streaming_recognize(requests=streaming_requests(audio_queue, stop_event))
+            async for response in responses:
+                backoff = RETRY_BACKOFF_MIN_S # The session works, so the next error is a fresh glitch
+                # Non-final results are consecutive pieces of one hypothesis (e.g. "to be"
+                # then " or not to be"), so they are joined, leading spaces included
+                interim = []
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    if result.is_final:
+                        text = result.alternatives[0].transcript.strip()
+                        if __debug__ and VERBOSE:
+                            logger.debug("Transcribed: %s", text)
+                        pending_transcripts.append((stop_event, text, True))
+                    else:
+                        interim.append(result.alternatives[0].transcript)
+                if interim:
+                    pending_transcripts.append((stop_event, "".join(interim).strip(), False))
 
         except Exception as e:
-            print(f"An error occurred with the microphone or STT: {e}")
+            logger.warning("An error occurred with the microphone or STT: %s", e)
             # transcribed_text_area.insert(tk.END, f"[Mic/STT Error: {e}]\n")
-            status_label.config(text="Status: Error in STT. Retrying...")
-            app.update_idletasks()
-            if not is_listening:
+            post_ui(set_status, "Status: Error in STT. Retrying...")
+            # Recover quickly from a brief glitch, back off under a persistent failure,
+            # and stop straight away if asked to while waiting
+            try:
+                await asyncio.wait_for(stop_event.wait(), backoff + random.random() * 0.05)
                 break
-            threading.Event().wait(1) # Wait a bit before retrying
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, RETRY_BACKOFF_MAX_S)
 
-    status_label.config(text="Status: Not Listening")
-    listen_button.config(text="Start Listening")
+    if stream is not None:
+        stream.close()
+    post_ui(finish_listening, stop_event)
+    logger.info("Listening loop ended.")
+
+def finish_listening(stop_event):
+    global is_listening
+    if stop_event is not stop_listening:
+        return # A newer listening period has already started
     is_listening = False # Ensure state is correct
-    print("Listening loop ended.")
+    set_status("Status: Not Listening")
+    listen_button.config(text="Start Listening")
 
 
 # --- Gemini Functionality ---
 def get_gemini_suggestion():
+    global last_gemini_prompt
     if not GEMINI_API_KEY:
         messagebox.showerror("API Key Error", "Gemini API Key not configured. Please set the GEMINI_API_KEY environment variable.")
         return
 
-    current_text = transcribed_text_area.get(1.0, tk.END).strip()
-    if not current_text:
+    # Only send what was said since the last suggestion. The interim hypothesis is
+    # included but not counted as sent, since it will be replaced by its final result.
+    sent_count = len(unsent_transcript)
+    new_text = "\n".join([*unsent_transcript, current_interim]).strip()
+    if new_text:
+        # The interview framing lives in GEMINI_SYSTEM_INSTRUCTION, so the prompt is just the text
+        prompt = new_text
+        if conversation_summary:
+            prompt = f"Earlier in the interview (summary): {conversation_summary}\n\nLatest: {new_text}"
+    elif last_gemini_prompt:
+        prompt = last_gemini_prompt # Nothing new was said, ask about the same text again
+    else:
         messagebox.showinfo("No Text", "No transcribed text to send to Gemini.")
         return
+    last_gemini_prompt = prompt
 
-    gemini_suggestions_area.delete(1.0, tk.END)
-    gemini_suggestions_area.insert(tk.END, "Getting suggestions from Gemini...\n")
-    app.update_idletasks()
+    # Asking again about the same text would just pay for an identical generation
+    cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+    if cache_key in gemini_cache:
+        gemini_cache.move_to_end(cache_key)
+        gemini_suggestions_area.delete(1.0, tk.END)
+        gemini_suggestions_area.insert(tk.END, gemini_cache[cache_key] + "\n")
+        if __debug__ and VERBOSE:
+            logger.debug("Gemini Response (cached)")
+        return
 
-    # Show loading status
+    # Show loading status. The previous suggestion stays visible until the first
+    # chunk arrives, so the area doesn't blank out during the API handshake.
     status_label.config(text="Status: Getting Gemini suggestion...")
-    app.update_idletasks()
-
+    gemini_button.config(state=tk.DISABLED)
+    # Tagged with the listening period's stop event: starting a new period clears the
+    # transcript and summary, and late results from the old one must not touch them
+    run_async(stream_gemini_suggestion(stop_listening, prompt, cache_key, new_text, sent_count))
+
+async def stream_gemini_suggestion(session, prompt, cache_key, new_text, sent_count):
+    """Insert Gemini's response into the suggestions area chunk by chunk."""
+    chunks = []
     try:
-        # For text-only input
-        model = genai.GenerativeModel('gemini-pro') # Or other suitable model
+        await asyncio.to_thread(load_gemini) # Usually already done by prewarm_imports
+        response = await gemini_model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if not chunks:
+                post_ui(gemini_suggestions_area.delete, 1.0, tk.END)
+            chunks.append(chunk.text)
+            post_ui(gemini_suggestions_area.insert, tk.END, chunk.text)
+            post_ui(gemini_suggestions_area.see, tk.END)
+
+        response_text = "".join(chunks)
+        post_ui(gemini_suggestions_area.insert, tk.END, "\n")
+        post_ui(cache_gemini_response, cache_key, response_text)
+        if __debug__ and VERBOSE:
+            logger.debug("Gemini Response: %s", response_text)
+        if new_text:
+            post_ui(mark_transcript_sent, session, sent_count)
+            task = asyncio.create_task(refresh_conversation_summary(session, new_text))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
 
-        # Simple prompt, can be made more sophisticated
-        prompt = f"I am in an interview. Here is the recent conversation or question directed at me: \"{current_text}\". Please provide concise talking points or a suggested response for me."
+    except Exception as e:
+        post_ui(gemini_suggestions_area.delete, 1.0, tk.END)
+        post_ui(gemini_suggestions_area.insert, tk.END, f"Error from Gemini: {e}\n")
+        logger.error("Error calling Gemini API: %s", e)
+    finally:
+        post_ui(finish_gemini_suggestion)
+
+async def refresh_conversation_summary(session, new_text):
+    """Fold new_text into the rolling summary sent as context with later suggestions."""
+    global conversation_summary
+    async with summary_lock:
+        if session is not stop_listening:
+            return # A new listening period has started with a fresh summary
+        summary = conversation_summary
+        try:
+            response = await gemini_summary_model.generate_content_async(
+                f"Summary so far: {summary}\n\nNew transcript: {new_text}")
+            summary = response.text.strip()[:CONVERSATION_SUMMARY_CHARS]
+        except Exception as e:
+            # Keep the most recent context rather than losing it
+            summary = f"{summary} {new_text}".strip()[-CONVERSATION_SUMMARY_CHARS:]
+            logger.warning("Error refreshing conversation summary: %s", e)
+        if session is stop_listening:
+            conversation_summary = summary
 
-        response = model.generate_content(prompt)
+def mark_transcript_sent(session, sent_count):
+    if session is not stop_listening:
+        return # Sent from an earlier listening period; its transcript is already gone
+    # Utterances finalized while the request was running stay queued for the next one
+    for _ in range(min(sent_count, len(unsent_transcript))):
+        unsent_transcript.popleft()
 
-        gemini_suggestions_area.delete(1.0, tk.END)
-        gemini_suggestions_area.insert(tk.END, response.text + "\n")
-        print("Gemini Response:", response.text)
+def cache_gemini_response(cache_key, response_text):
+    gemini_cache[cache_key] = response_text
+    if len(gemini_cache) > GEMINI_CACHE_SIZE:
+        gemini_cache.popitem(last=False) # Evict the least recently used response
 
-    except Exception as e:
-        gemini_suggestions_area.delete(1.0, tk.END)
-        gemini_suggestions_area.insert(tk.END, f"Error from Gemini: {e}\n")
-        print(f"Error calling Gemini API: {e}")
-    finally:
-        status_label.config(text="Status: Idle" if not is_listening else "Status: Listening...")
-        app.update_idletasks()
+def finish_gemini_suggestion():
+    gemini_button.config(state=tk.NORMAL)
+    status_label.config(text="Status: Idle" if not is_listening else "Status: Listening...")
 
 
 # --- GUI Setup ---
@@ -182,6 +640,22 @@ listen_button.pack(side=tk.LEFT, padx=5)
 gemini_button = tk.Button(control_frame, text="Get Gemini Suggestion", command=get_gemini_suggestion)
 gemini_button.pack(side=tk.LEFT, padx=5)
 
+# Frame for endpointing settings (applied on Enter / focus change)
+stt_frame = tk.Frame(app)
+stt_frame.pack()
+
+tk.Label(stt_frame, text="Speech end timeout (ms):").pack(side=tk.LEFT)
+speech_end_entry = tk.Entry(stt_frame, width=6)
+speech_end_entry.insert(0, str(SPEECH_END_TIMEOUT_MS))
+speech_end_entry.pack(side=tk.LEFT, padx=5)
+speech_end_entry.bind("<Return>", apply_stt_settings)
+speech_end_entry.bind("<FocusOut>", apply_stt_settings)
+
+tk.Label(stt_frame, text="Endpointing:").pack(side=tk.LEFT)
+sensitivity_var = tk.StringVar(value=ENDPOINTING_SENSITIVITY)
+sensitivity_menu = tk.OptionMenu(stt_frame, sensitivity_var, *ENDPOINTING_SENSITIVITIES, command=apply_stt_settings)
+sensitivity_menu.pack(side=tk.LEFT, padx=5)
+
 status_label = tk.Label(app, text="Status: Not Listening")
 status_label.pack(pady=5)
 
@@ -190,6 +664,8 @@ trans_frame = tk.LabelFrame(app, text="Transcribed Interview Text")
 trans_frame.pack(padx=10, pady=5, fill="x")
 transcribed_text_area = scrolledtext.ScrolledText(trans_frame, wrap=tk.WORD, height=10)
 transcribed_text_area.pack(padx=5, pady=5, fill="x", expand=True)
+transcribed_text_area.mark_set("interim", "end-1c")
+transcribed_text_area.mark_gravity("interim", tk.LEFT) # Stay before text inserted at the mark
 
 # Gemini Suggestions Area
 gemini_frame = tk.LabelFrame(app, text="Gemini Suggestions")
@@ -200,15 +676,20 @@ gemini_suggestions_area.pack(padx=5, pady=5, fill="both", expand=True)
 
 def on_closing():
     global is_listening
-    print("Closing application...")
+    logger.info("Closing application...")
     if is_listening:
-        is_listening = False # Signal listening thread to stop
-        if listening_thread and listening_thread.is_alive():
-            print("Waiting for listening thread to finish...")
-            listening_thread.join(timeout=2) # Wait for the thread to finish
+        is_listening = False
+        signal_async(stop_listening) # Signal the listening loop to stop
+        if listening_future and not listening_future.done():
+            logger.info("Waiting for listening loop to finish...")
+            try:
+                listening_future.result(timeout=2) # Wait for the microphone to be closed
+            except Exception:
+                pass # Timed out or failed; the loop thread is a daemon and dies with the app
     app.destroy()
 
 app.protocol("WM_DELETE_WINDOW", on_closing)
+app.after(50, drain_ui_queue)
 
 if __name__ == "__main__":
     if not GEMINI_API_KEY:
@@ -216,4 +697,11 @@ if __name__ == "__main__":
                                "GEMINI_API_KEY is not set. Please set it as an environment variable "
                                "or in a .env file (e.g., GEMINI_API_KEY=YOUR_KEY).\n\n"
                                "The application will run, but Gemini features will not work.")
+    if not GOOGLE_CLOUD_PROJECT:
+        messagebox.showwarning("Google Cloud Project Missing",
+                               "GOOGLE_CLOUD_PROJECT is not set. Please set it as an environment variable "
+                               "or in a .env file (e.g., GOOGLE_CLOUD_PROJECT=my-project).\n\n"
+                               "The application will run, but listening will not work.")
+    app.after_idle(lambda: threading.Thread(target=prewarm_imports, daemon=True).start())
     app.mainloop()
+    log_listener.stop() # Flush any records still queued